@@ -30,18 +30,30 @@ DEFAULT_FIELDS = (
 )
 
 
-def call_endpoint(path, params):
-    """Call IBKR endpoint via wrapper"""
+def call_endpoint_raw(path, params):
+    """Call IBKR endpoint via wrapper and return the raw JSON text (or None)"""
     cmd = ["python3", WRAPPER, "call_endpoint", f"path:{path}", f"params:{params}"]
     result = subprocess.run(cmd, capture_output=True, text=True)
     if result.returncode != 0:
         return None
+    return result.stdout
+
+
+def parse_response(text):
+    """Parse wrapper output as JSON (None if missing or invalid)"""
+    if not text:
+        return None
     try:
-        return json.loads(result.stdout)
+        return json.loads(text)
     except:
         return None
 
 
+def call_endpoint(path, params):
+    """Call IBKR endpoint via wrapper"""
+    return parse_response(call_endpoint_raw(path, params))
+
+
 def authenticate():
     """Authenticate with IBKR"""
     return call_endpoint("iserver/accounts", "{}")
@@ -61,15 +73,15 @@ def get_snapshot(conids, fields=None, delay=50):
     params = json.dumps({"conids": conids, "fields": fields})
     
     # Call TWICE as per IBKR API requirements
-    # First call initiates the request
-    result1 = call_endpoint("iserver/marketdata/snapshot", params)
+    # First call initiates the request (only parsed if the second call fails)
+    raw1 = call_endpoint_raw("iserver/marketdata/snapshot", params)
     
     # Delay to let IBKR calculate derived fields (especially EMA, price data)
     time.sleep(delay)
     
     # Second call gets the actual data
     result2 = call_endpoint("iserver/marketdata/snapshot", params)
-    return result2 if result2 else result1
+    return result2 if result2 else parse_response(raw1)
 
 
 # Field code mapping (generated via ibind snapshot_ids_to_keys)
@@ -94,6 +106,9 @@ FIELD_NAMES = {
     7762: "volume_long",
 }
 
+# FIELD_NAMES keyed by the string IDs IBKR uses in responses, built once
+FIELD_NAMES_BY_ID = {str(field_id): name for field_id, name in FIELD_NAMES.items()}
+
 
 def format_output(data):
     """Format the output nicely with field names"""
@@ -197,7 +212,7 @@ Examples:
         sys.exit(1)
     
     # Get snapshot
-    print(f"Fetching market snapshots for {len(args.conids.split(','))} conids (delay={args.delay}s)...", file=sys.stderr)
+    print(f"Fetching market snapshots for {args.conids.count(',') + 1} conids (delay={args.delay}s)...", file=sys.stderr)
     result = get_snapshot(args.conids, args.fields, delay=args.delay)
     
     if result:
@@ -208,8 +223,7 @@ Examples:
             mapped = dict(item)
             
             # Map numeric field IDs to names
-            for field_id, field_name in FIELD_NAMES.items():
-                str_id = str(field_id)
+            for str_id, field_name in FIELD_NAMES_BY_ID.items():
                 if str_id in mapped:
                     mapped[field_name] = mapped.pop(str_id)
             
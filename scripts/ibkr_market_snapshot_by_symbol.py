@@ -10,11 +10,21 @@ import json
 import subprocess
 import sys
 import shlex
+import time
+
+WRAPPER = "/home/node/.openclaw/workspace/bin/ibkr_mcp_wrapper.py"
+
+# Default snapshot fields, built once rather than on every call
+DEFAULT_FIELDS = (
+    "31,55,70,71,82,83,84,86,87,6008,6070,6457,7051,7084,7085,7086,7087,7088,7089,"
+    "7282,7283,7285,7289,7290,7291,7293,7294,7295,7296,7607,7633,7638,7644,7655,"
+    "7674,7675,7676,7677,7682,7683,7684,7685,7686,7687,7688,7689,7690,7718,7741,7762"
+)
 
 def search_conid(symbol):
     """Find conid for a given ticker symbol."""
     params = f'{{"symbol":"{symbol}","sectype":"STK"}}'
-    cmd = f'python3 /home/node/.openclaw/workspace/bin/ibkr_mcp_wrapper.py call_endpoint path:iserver/secdef/search params:\'{params}\''
+    cmd = f'python3 {WRAPPER} call_endpoint path:iserver/secdef/search params:\'{params}\''
     
     result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
     try:
@@ -34,9 +44,9 @@ def search_conid(symbol):
 
 def get_snapshot(conid, delay=50):
     """Fetch market snapshot for conid."""
-    params = f'{{"conids":"{conid}","fields":"31,55,70,71,82,83,84,86,87,6008,6070,6457,7051,7084,7085,7086,7087,7088,7089,7282,7283,7285,7289,7290,7291,7293,7294,7295,7296,7607,7633,7638,7644,7655,7674,7675,7676,7677,7682,7683,7684,7685,7686,7687,7688,7689,7690,7718,7741,7762"}}'
+    params = f'{{"conids":"{conid}","fields":"{DEFAULT_FIELDS}"}}'
     
-    cmd = f'python3 /home/node/.openclaw/workspace/bin/ibkr_mcp_wrapper.py call_endpoint path:iserver/marketdata/snapshot params:\'{params}\''
+    cmd = f'python3 {WRAPPER} call_endpoint path:iserver/marketdata/snapshot params:\'{params}\''
     
     print(f"Fetching market snapshot for conid {conid} (delay={delay}s)...", file=sys.stderr)
     
@@ -44,7 +54,6 @@ def get_snapshot(conid, delay=50):
     subprocess.run(cmd, shell=True, capture_output=True)
     
     # Wait for data to populate
-    import time
     time.sleep(delay)
     
     # Second call
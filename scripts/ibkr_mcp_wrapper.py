@@ -42,6 +42,9 @@ import urllib.error
 # Make server URL configurable via environment variable
 IBKR_SERVER = os.environ.get("IBKR_SERVER", "http://mcp-server:8000/mcp")
 
+# Argument values that map to JSON literals (matched case-insensitively)
+_LITERALS = {"null": None, "true": True, "false": False}
+
 # Counter for unique request IDs
 _request_id_counter = 0
 _session_id = None
@@ -193,6 +196,19 @@ def call_tool(tool, args):
         print(result_text)
 
 
+def parse_value(value):
+    """Convert a command-line argument value to null/bool, a JSON object/array, or leave it a string."""
+    literal = value.lower()
+    if literal in _LITERALS:
+        return _LITERALS[literal]
+    if value.startswith(("{", "[")):
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            pass
+    return value
+
+
 def main():
     global _session_id
     
@@ -213,23 +229,7 @@ def main():
     for arg in sys.argv[2:]:
         if ":" in arg:
             key, value = arg.split(":", 1)
-            if value.lower() == "null":
-                value = None
-            elif value.lower() == "true":
-                value = True
-            elif value.lower() == "false":
-                value = False
-            elif value.startswith("{"):
-                try:
-                    value = json.loads(value)
-                except json.JSONDecodeError:
-                    pass
-            elif value.startswith("["):
-                try:
-                    value = json.loads(value)
-                except json.JSONDecodeError:
-                    pass
-            args[key] = value
+            args[key] = parse_value(value)
     
     # Call the tool
     call_tool(tool, args)
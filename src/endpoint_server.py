@@ -2,13 +2,24 @@
 Tailored for LLM, this module provides a FastMCP server with documentation to call IBKR (Interactive Brokers) web api endpoints, through ibind rest client (which provides OAuth).
 """
 import os
+import re
 import sys
+import time
+import random
+import asyncio
 import logging
-from typing import Any, Dict, Optional, Callable, TypeVar, Awaitable
-
-import json
+import sqlite3
+import functools
+import threading
+import contextlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, Hashable, List, Optional, Sequence, Tuple, Union, Callable, TypeVar, Awaitable
+
+import orjson
 from mcp.server.fastmcp import FastMCP
 from mcp.server.transport_security import TransportSecuritySettings
+from starlette.applications import Starlette
 from dotenv import load_dotenv
 
 # Configure logging
@@ -78,14 +89,19 @@ _load_secrets_from_files()
 if not os.environ.get("ALLOWED_HOSTS"):
     os.environ["ALLOWED_HOSTS"] = "localhost,127.0.0.1,mcp-server,mcp-server:8000,172.22.0.0/16,172.18.0.0/16"
 
-# Now import ibind after secrets are loaded
-from ibind import IbkrClient
+# ibind is imported lazily in get_client() (after secrets are loaded above), so a cold
+# start that only serves documentation tools never pays for importing it
+if TYPE_CHECKING:
+    from ibind import IbkrClient
 
 # Global client instance
-_ibind_client: Optional[IbkrClient] = None
+_ibind_client: Optional["IbkrClient"] = None
+# Serializes client construction; see get_client
+_client_lock = threading.Lock()
 
-# Allowed endpoints whitelist
-ALLOWED_ENDPOINTS = {
+# Allowed endpoints whitelist; a frozenset since it is checked on every call and
+# must not change at runtime
+ALLOWED_ENDPOINTS = frozenset({
     "iserver/accounts",  # Note: plural "accounts" not "account"
     "iserver/secdef/search",
     "iserver/secdef/info",
@@ -96,6 +112,55 @@ ALLOWED_ENDPOINTS = {
     "trsrv/stocks",
     "iserver/marketdata/snapshot",
     "iserver/marketdata/history",
+})
+
+# Sorted once for the "not allowed" error instead of on every rejected call
+_ALLOWED_ENDPOINTS_SORTED = tuple(sorted(ALLOWED_ENDPOINTS))
+
+# Seconds to cache successful responses per endpoint. Only reference data (contract
+# definitions, symbol lookups, bond filters) is listed here; history has its own TTLs
+# below, and accounts and snapshots are not cached here.
+RESPONSE_CACHE_TTLS = {
+    "iserver/secdef/search": 86400,
+    "iserver/secdef/info": 3600,
+    "iserver/secdef/bond-filters": 86400,
+    "trsrv/secdef": 86400,
+    "trsrv/futures": 3600,
+    "trsrv/stocks": 86400,
+}
+
+# History is cached for less time than reference data, since the latest bar keeps
+# moving until it closes: intraday bar sizes for a minute, daily and longer for 15 minutes.
+HISTORY_CACHE_TTL_INTRADAY = 60
+HISTORY_CACHE_TTL_DAILY = 900
+
+# History bar sizes are a count and a unit, e.g. "30secs", "5mins", "2hrs" (intraday)
+# or "1d", "1w", "1m" (daily and longer; "m" is a month). See endpoints.md.
+_BAR_SIZE_RE = re.compile(r"\s*(\d+)\s*([a-z]+)\s*")
+_INTRADAY_BAR_UNITS = frozenset({"s", "sec", "secs", "min", "mins", "h", "hr", "hrs", "hour", "hours"})
+
+# Parameters each endpoint cannot be called without (see endpoints.md). Checked locally
+# so a malformed call fails fast instead of costing an IBKR round trip.
+REQUIRED_PARAMS = {
+    "iserver/secdef/search": ("symbol",),
+    "iserver/secdef/info": ("conid",),
+    "iserver/secdef/bond-filters": ("symbol", "issuerId"),
+    "trsrv/secdef": ("conids",),
+    "trsrv/futures": ("symbols",),
+    "trsrv/stocks": ("symbols",),
+    "iserver/marketdata/snapshot": ("conids",),
+    "iserver/marketdata/history": ("conid", "bar"),
+}
+
+# Further iserver/secdef/info parameters required for some security types (see
+# endpoints.md): derivatives need an expiry month, options a strike and right,
+# and bonds the issuerId.
+SECDEF_INFO_REQUIRED_BY_SECTYPE = {
+    "OPT": ("month", "strike", "right"),
+    "FOP": ("month", "strike", "right"),
+    "WAR": ("month", "strike", "right"),
+    "FUT": ("month",),
+    "BOND": ("issuerId",),
 }
 
 
@@ -128,12 +193,108 @@ F = TypeVar("F", bound=Callable[..., Awaitable[str]])
 
 
 def mcp_tool(func: F) -> F:
-    """Custom decorator for MCP tools that automatically sets structured_output=False."""
+    """
+    Custom decorator for MCP tools that automatically sets structured_output=False.
+
+    FastMCP inspects the signature and docstring once, here at import time, and
+    compiles the input schema into a Pydantic argument model. Each call is then
+    validated against that model without re-inspecting the function.
+    """
 
     return server.tool(structured_output=False)(func)  # type: ignore
 
 
-def get_client(fail_on_auth_error: bool = True) -> Optional[IbkrClient]:
+def json_errors(func: F) -> F:
+    """
+    Decorator for tools returning JSON: report unexpected exceptions as an error dict.
+
+    Expected failures already come back from _call_endpoint as {"error": ...}. This
+    covers the rest (bugs, unexpected payload shapes), so every JSON tool fails with
+    the same shape instead of FastMCP's plain-text tool error. Apply it below @mcp_tool.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> str:
+        try:
+            return await func(*args, **kwargs)
+        except Exception as e:
+            logger.exception("Tool %s failed", func.__name__)
+            return _to_json(_err(f"{type(e).__name__}: {str(e)}"))
+
+    return wrapper  # type: ignore
+
+
+# Shared thread pool for blocking ibind calls. ibind is synchronous, so running its
+# requests on the event loop would serialize every concurrent tool invocation.
+# An async HTTP client is not an option here: ibind signs each OAuth request and
+# refreshes the live session token inside its own synchronous request path, so
+# all IBKR I/O goes through ibind and overlaps via this pool instead.
+# IBKR_IO_WORKERS overrides the size. More threads than IBKR's rate limit can keep
+# busy (about 50 requests/second) only add idle waiters on the token bucket.
+_DEFAULT_IO_WORKERS = 8
+
+
+def _io_workers_from_env() -> int:
+    """Return the IO pool size from IBKR_IO_WORKERS, or the default if it is unset or invalid."""
+    value = os.environ.get("IBKR_IO_WORKERS")
+    if not value:
+        return _DEFAULT_IO_WORKERS
+    try:
+        workers = int(value)
+    except ValueError:
+        workers = 0
+    if workers < 1:
+        logger.warning("Ignoring IBKR_IO_WORKERS=%r (expected a positive integer), using %d", value, _DEFAULT_IO_WORKERS)
+        return _DEFAULT_IO_WORKERS
+    return workers
+
+
+_IO_WORKERS = _io_workers_from_env()
+_IO_POOL = ThreadPoolExecutor(max_workers=_IO_WORKERS, thread_name_prefix="ibkr-io")
+
+
+async def _run_blocking(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking function on the shared IBKR thread pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_IO_POOL, functools.partial(func, *args, **kwargs))
+
+
+def _mount_connection_pool(client: "IbkrClient") -> None:
+    """
+    Size the ibind client's requests.Session connection pool to the IO thread pool.
+
+    ibind keeps a persistent requests.Session, but its default adapter holds at most
+    10 connections, and ibind replaces the session after connection errors. Mounting
+    an adapter with one keep-alive connection per worker means concurrent tool calls
+    reuse warm TLS connections instead of opening new ones. The adapter is mounted
+    again whenever ibind recreates the session (ibind closes the old one first).
+
+    The adapter retries a GET once if the connection cannot be established. Nothing
+    is retried once the request has been sent: read errors and timeouts are left to
+    ibind's own timeout retries (and the signed request may already have been
+    processed), and HTTP error statuses are not retried; 401s go through
+    _request_with_reauth instead.
+    """
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(total=1, connect=1, read=False, status=0, allowed_methods=frozenset({"GET"}), raise_on_status=False)
+
+    def _mount(session: Any) -> None:
+        if session is not None:
+            session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=_IO_WORKERS * 2, max_retries=retry))
+
+    make_session = client.make_session
+
+    def _make_pooled_session() -> None:
+        make_session()
+        _mount(client._session)
+
+    client.make_session = _make_pooled_session  # type: ignore[method-assign]
+    _mount(getattr(client, "_session", None))
+
+
+def get_client(fail_on_auth_error: bool = True) -> Optional["IbkrClient"]:
     """
     Get or initialize the ibind client (lazy-loaded on first use).
 
@@ -144,12 +305,25 @@ def get_client(fail_on_auth_error: bool = True) -> Optional[IbkrClient]:
     Returns None if connection fails (when fail_on_auth_error=False).
     Exits the process if authentication fails (when fail_on_auth_error=True).
     Subsequent calls reuse the same authenticated connection.
+    Safe to call from the IO pool threads: the client is built at most once, and
+    the common case (already built) reads the global without taking the lock.
     """
 
     global _ibind_client
-    if _ibind_client is None:
+    client = _ibind_client
+    if client is not None:
+        return client
+
+    with _client_lock:
+        if _ibind_client is not None:
+            return _ibind_client
         try:
-            _ibind_client = IbkrClient()
+            from ibind import IbkrClient
+
+            # Always use a persistent session (even if IBIND_USE_SESSION disables it),
+            # so requests reuse pooled keep-alive connections
+            client = IbkrClient(use_session=True)
+            _mount_connection_pool(client)
         except Exception as e:
             error_str = str(e)
             logger.error("IBKR Connection Error: %s: %s", type(e).__name__, error_str)
@@ -163,13 +337,428 @@ def get_client(fail_on_auth_error: bool = True) -> Optional[IbkrClient]:
             else:
                 logger.warning("Contract tools will fail until connection is established")
             return None
-    return _ibind_client
+        # Publish only once fully set up, so lock-free readers never see a bare client
+        _ibind_client = client
+    return client
+
+
+def _reset_client() -> None:
+    """
+    Close the cached ibind client and forget it; called on server shutdown.
+
+    The OAuth session is logged out and its connections closed; cached accounts
+    belonged to that session and are cleared. This does not reload credentials: a
+    client built afterwards still uses the secrets loaded at import.
+    """
+    global _ibind_client
+    with _client_lock:
+        client, _ibind_client = _ibind_client, None
+    _accounts_cache.clear()
+    if client is not None:
+        # ibind's own atexit handler checks this flag; without it, exit would log out twice
+        client._closed = True
+        try:
+            client.close()
+        except Exception as e:
+            logger.warning("Error closing IBKR client: %s: %s", type(e).__name__, e)
+
+
+# Optional sqlite file backing the reference-data caches, so a restarted server starts
+# warm instead of re-resolving every symbol and contract. Unset means memory only.
+CACHE_PATH = os.environ.get("IBKR_CACHE_PATH") or None
+
+
+class _SqliteCacheStore:
+    """
+    Write-through sqlite backing for a _TTLCache.
+
+    Entries are stored with a wall-clock expiry so they remain valid across restarts.
+    The database runs in WAL mode, so several caches (and processes) can share one
+    file. Access is serialized by the store's own lock, so the owning cache's memory
+    lock is never held during sqlite I/O.
+    """
+
+    __slots__ = ("_namespace", "_conn", "_lock")
+
+    def __init__(self, path: str, namespace: str) -> None:
+        self._namespace = namespace
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, expires_at REAL NOT NULL, value BLOB NOT NULL, "
+            "PRIMARY KEY (namespace, key))"
+        )
+        self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+
+    def get(self, key: Hashable) -> Optional[Tuple[float, Any]]:
+        """Return (seconds left, value) for an unexpired key, or None."""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT expires_at, value FROM cache WHERE namespace = ? AND key = ?",
+                    (self._namespace, repr(key)),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Cache read failed: %s", e)
+            return None
+        if row is None:
+            return None
+        remaining = row[0] - time.time()
+        if remaining <= 0:
+            return None
+        return remaining, orjson.loads(row[1])
+
+    def get_many(self, keys: Sequence[Hashable]) -> Dict[Hashable, Tuple[float, Any]]:
+        """Return {key: (seconds left, value)} for the unexpired keys, in one query."""
+        by_repr = {repr(key): key for key in keys}
+        if not by_repr:
+            return {}
+        placeholders = ",".join("?" * len(by_repr))
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT key, expires_at, value FROM cache WHERE namespace = ? AND key IN ({placeholders})",
+                    (self._namespace, *by_repr),
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("Cache read failed: %s", e)
+            return {}
+        now = time.time()
+        return {
+            by_repr[key]: (expires_at - now, orjson.loads(value))
+            for key, expires_at, value in rows
+            if expires_at > now
+        }
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items: Dict[Hashable, Any], ttl: float) -> None:
+        """Write every item with the same ttl in one transaction."""
+        expires_at = time.time() + ttl
+        try:
+            rows = [(self._namespace, repr(key), expires_at, orjson.dumps(value)) for key, value in items.items()]
+            with self._lock:
+                self._conn.execute("BEGIN")
+                try:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO cache (namespace, key, expires_at, value) VALUES (?, ?, ?, ?)",
+                        rows,
+                    )
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self._conn.execute("COMMIT")
+        except (sqlite3.Error, TypeError) as e:
+            logger.warning("Cache write failed: %s", e)
+
+    def clear(self) -> None:
+        try:
+            with self._lock:
+                self._conn.execute("DELETE FROM cache WHERE namespace = ?", (self._namespace,))
+        except sqlite3.Error as e:
+            logger.warning("Cache clear failed: %s", e)
+
+
+class _TTLCache:
+    """
+    Small thread-safe LRU cache whose entries expire after a per-entry TTL.
+
+    If persist_path is given, entries are also written through to sqlite under
+    namespace, and memory misses are read back from it. The memory lock is not held
+    during sqlite I/O; callers on the event loop should use get(load=False) and do
+    load_many/set_many on the IO pool.
+    """
+
+    # Attributes are read on every lookup; slots make those reads a fixed-offset load
+    __slots__ = ("_data", "_maxsize", "_lock", "_store")
+
+    def __init__(self, maxsize: int = 4096, persist_path: Optional[str] = None, namespace: str = "") -> None:
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._maxsize = maxsize
+        self._lock = threading.Lock()
+        self._store: Optional[_SqliteCacheStore] = None
+        if persist_path:
+            try:
+                self._store = _SqliteCacheStore(persist_path, namespace)
+            except sqlite3.Error as e:
+                logger.warning("Could not open cache file %s, caching in memory only: %s", persist_path, e)
+
+    @property
+    def persistent(self) -> bool:
+        """True if entries are written through to sqlite."""
+        return self._store is not None
+
+    def get(self, key: Hashable, default: Any = None, load: bool = True) -> Any:
+        """
+        Return the cached value for key, or default if missing or expired.
+
+        A memory miss is read back from sqlite unless load is False.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at < time.monotonic():
+                    del self._data[key]
+                    return default
+                self._data.move_to_end(key)
+                return value
+        if self._store is None or not load:
+            return default
+        stored = self._store.get(key)
+        if stored is None:
+            return default
+        remaining, value = stored
+        with self._lock:
+            self._put(key, value, remaining)
+        return value
+
+    def load_many(self, keys: Sequence[Hashable]) -> Dict[Hashable, Any]:
+        """Read keys back from sqlite in one query, cache them in memory and return the hits."""
+        if self._store is None:
+            return {}
+        stored = self._store.get_many(keys)
+        with self._lock:
+            for key, (remaining, value) in stored.items():
+                self._put(key, value, remaining)
+        return {key: value for key, (_, value) in stored.items()}
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        """Store value under key for ttl seconds, evicting the least recently used entries."""
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items: Dict[Hashable, Any], ttl: float) -> None:
+        """Store every item for ttl seconds; sqlite gets them in one transaction."""
+        with self._lock:
+            for key, value in items.items():
+                self._put(key, value, ttl)
+        if self._store is not None:
+            self._store.set_many(items, ttl)
+
+    def _put(self, key: Hashable, value: Any, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+        if self._store is not None:
+            self._store.clear()
+
+
+# Cache of successful reference-data responses, keyed by (path, params)
+_response_cache = _TTLCache(persist_path=CACHE_PATH, namespace="response")
+
+
+def _err(message: str, **context: Any) -> Dict[str, Any]:
+    """
+    Build an error result dict.
+
+    Args:
+        message: Human-readable error message.
+        **context: Extra keys to include (e.g. requested_symbol, allowed_endpoints).
+
+    Returns:
+        Dict with an 'error' key followed by any context keys.
+    """
+    if context:
+        return {"error": message, **context}
+    return {"error": message}
+
+
+# Fixed-shape error responses, built once and shared (never mutate these)
+_NO_CLIENT_SUGGESTION = "Check the IBKR OAuth credentials in .env and the network connection"
+_ERR_NO_CLIENT = _err("IBKR client not initialized", suggestion=_NO_CLIENT_SUGGESTION)
+_ERR_NO_CLIENT_JSON = orjson.dumps(_ERR_NO_CLIENT).decode()
+_ERR_ACCOUNTS_NO_CLIENT_JSON = orjson.dumps(
+    _err("Failed to get accounts: IBKR client not initialized", suggestion=_NO_CLIENT_SUGGESTION)
+).decode()
+_ERR_REAUTH_FALSE = _err("Session expired and re-authentication returned False")
+_ERR_NO_SYMBOLS_JSON = orjson.dumps(_err("No symbols provided")).decode()
+_ERR_NO_CONIDS_JSON = orjson.dumps(_err("No conids provided")).decode()
+# Rejected-endpoint response with the allowlist pre-encoded; the "\0" placeholder
+# is replaced by the encoded message (see _endpoint_not_allowed_json)
+_ERR_NOT_ALLOWED_TEMPLATE = orjson.dumps(_err("\0", allowed_endpoints=_ALLOWED_ENDPOINTS_SORTED)).decode()
+
+
+def _endpoint_not_allowed_json(path: str) -> str:
+    """Return the JSON error for a path outside ALLOWED_ENDPOINTS."""
+    message = orjson.dumps(f"Endpoint '{path}' is not allowed.").decode()
+    return _ERR_NOT_ALLOWED_TEMPLATE.replace('"\\u0000"', message, 1)
+
+
+def _json_default(obj: Any) -> Any:
+    """
+    orjson fallback for the few types it does not encode natively.
+
+    Sets become lists; anything else (e.g. Decimal) is encoded as its str(). orjson
+    handles dicts, lists, numbers, datetimes and dataclasses itself, so IBKR payloads
+    never reach this function.
+    """
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    return str(obj)
+
+
+# orjson.dumps with the response options bound once, instead of per call
+_encode = functools.partial(orjson.dumps, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _to_json(obj: Any) -> str:
+    """
+    Serialize a tool response to a JSON string.
+
+    Uses orjson, which is several times faster than the stdlib json module on the
+    large payloads returned by snapshot and history calls. Pre-encoded static
+    errors are returned without re-serializing. Values orjson cannot encode
+    natively go through _json_default rather than failing the tool call.
+    """
+    if obj is _ERR_NO_CLIENT:
+        return _ERR_NO_CLIENT_JSON
+    return _encode(obj).decode()
+
+
+class _TokenBucket:
+    """Thread-safe token bucket rate limiter for blocking callers on the IO pool."""
+
+    __slots__ = ("_rate", "_capacity", "_tokens", "_updated", "_lock")
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take one token, sleeping the calling thread until one is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self._rate
+            time.sleep(wait)
+
+
+# IBKR allows about 50 requests/second per session and answers bursts above that with
+# 429s and temporary IP penalties. Pacing just under the limit keeps concurrent tool
+# calls at full throughput without tripping it.
+MAX_REQUESTS_PER_SECOND = 45
+_rate_limiter = _TokenBucket(rate=MAX_REQUESTS_PER_SECOND, capacity=MAX_REQUESTS_PER_SECOND)
+
+# Endpoints IBKR limits to a number of concurrent requests, across all tool calls.
+# Requests beyond the limit wait for a slot instead of being rejected by IBKR.
+ENDPOINT_CONCURRENCY = {
+    "iserver/marketdata/history": 5,
+}
+_endpoint_slots = {path: threading.BoundedSemaphore(limit) for path, limit in ENDPOINT_CONCURRENCY.items()}
+_NO_SLOT_LIMIT = contextlib.nullcontext()
+
+
+def _safe_get(client: "IbkrClient", path: str, params: Dict[str, Any]) -> Tuple[bool, Any]:
+    """
+    Issue a GET request and return a tagged result instead of raising.
+
+    Args:
+        client: The ibind client.
+        path: The API endpoint path.
+        params: Dictionary of parameters.
+
+    Returns:
+        (True, response data) on success, or (False, exception) on failure.
+    """
+    with _endpoint_slots.get(path, _NO_SLOT_LIMIT):
+        _rate_limiter.acquire()
+        try:
+            return True, client.get(path=path, params=params).data  # type: ignore
+        except Exception as e:
+            # ibind reports HTTP and network failures as exceptions (e.g. ExternalBrokerError)
+            return False, e
+
+
+def _request_key(path: str, params: Dict[str, Any]) -> Tuple[str, bytes]:
+    """Build a hashable key identifying a request by path and parameters."""
+    if not params:
+        return path, b""
+    return path, orjson.dumps(params, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+
+
+def _request_with_reauth(client: "IbkrClient", path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Send a GET request, re-authenticating and retrying once if the session expired.
+
+    Returns:
+        Dict with 'data' key on success, or 'error' key on failure.
+    """
+    ok, value = _safe_get(client, path, params)
+    if ok:
+        return {"data": value}
+
+    error_str = str(value)
+    # Check if it's an authentication error (401 Unauthorized)
+    if not ("401" in error_str or "Unauthorized" in error_str or "not authenticated" in error_str):
+        return _err(f"API request failed: {type(value).__name__}: {error_str}")
+
+    logger.warning("IBKR session expired, attempting re-authentication...")
+    try:
+        # This will regenerate the LST and restart the Tickler
+        # handle_auth_status() returns True if successful, False otherwise
+        reauthenticated = client.handle_auth_status(raise_exceptions=True)
+    except Exception as reauth_error:
+        logger.error("Re-authentication failed: %s", reauth_error)
+        return _err(f"Session expired and re-authentication failed: {type(reauth_error).__name__}: {str(reauth_error)}")
+    if not reauthenticated:
+        return _ERR_REAUTH_FALSE
+    # The new brokerage session has not seen iserver/accounts yet; drop the cached
+    # response so the next snapshot preflight primes it again
+    _accounts_cache.clear()
+
+    # Retry the original request after successful re-authentication
+    ok, value = _safe_get(client, path, params)
+    if ok:
+        return {"data": value}
+    logger.error("Request failed after re-authentication: %s", value)
+    return _err(f"Session expired and re-authentication failed: {type(value).__name__}: {str(value)}")
+
+
+def _cache_ttl(path: str, params: Dict[str, Any]) -> Optional[float]:
+    """Return how long to cache a successful response for this request, or None to skip caching."""
+    if path == "iserver/marketdata/history":
+        match = _BAR_SIZE_RE.fullmatch(str(params.get("bar", "")).lower())
+        # An unrecognized bar size gets the shorter TTL rather than risk serving stale bars
+        if match is None or match.group(2) in _INTRADAY_BAR_UNITS:
+            return HISTORY_CACHE_TTL_INTRADAY
+        return HISTORY_CACHE_TTL_DAILY
+    return RESPONSE_CACHE_TTLS.get(path)
+
+
+def _required_params(path: str, params: Dict[str, Any]) -> Tuple[str, ...]:
+    """Return the parameters a request to path cannot be sent without."""
+    required = REQUIRED_PARAMS.get(path, ())
+    if path == "iserver/secdef/info":
+        sec_type = str(params.get("sectype") or params.get("secType") or "").upper()
+        required += SECDEF_INFO_REQUIRED_BY_SECTYPE.get(sec_type, ())
+    return required
 
 
 def _call_endpoint(path: str, params: Dict[str, Any]) -> Dict[str, Any]:
     """
     Call an IBKR endpoint and return a consistent dict result.
 
+    Successful responses from endpoints listed in RESPONSE_CACHE_TTLS, and history
+    requests, are served from an in-process cache until they expire.
+
     Args:
         path: The API endpoint path.
         params: Dictionary of parameters.
@@ -179,39 +768,97 @@ def _call_endpoint(path: str, params: Dict[str, Any]) -> Dict[str, Any]:
     """
     # Validate path against allowlist
     if path not in ALLOWED_ENDPOINTS:
-        return {
-            "error": f"Endpoint '{path}' is not allowed.",
-            "allowed_endpoints": sorted(ALLOWED_ENDPOINTS),
-        }
+        return _err(f"Endpoint '{path}' is not allowed.", allowed_endpoints=_ALLOWED_ENDPOINTS_SORTED)
+
+    required = _required_params(path, params)
+    if required and not all(map(params.get, required)):
+        missing = [name for name in required if not params.get(name)]
+        return _err(f"Missing required parameter(s) for '{path}': {', '.join(missing)}")
+
+    cache_ttl = _cache_ttl(path, params)
+    if cache_ttl is not None:
+        cache_key = _request_key(path, params)
+        cached = _response_cache.get(cache_key)
+        if cached is not None:
+            return {"data": cached}
 
     client = get_client()
     if client is None:
-        return {"error": "IBKR client not initialized"}
+        return _ERR_NO_CLIENT
 
-    try:
-        result = client.get(path=path, params=params)  # type: ignore
-        return {"data": result.data}
-    except Exception as e:
-        error_str = str(e)
-        # Check if it's an authentication error (401 Unauthorized)
-        if "401" in error_str or "Unauthorized" in error_str or "not authenticated" in error_str:
-            logger.warning("IBKR session expired, attempting re-authentication...")
-            try:
-                # This will regenerate the LST and restart the Tickler
-                # handle_auth_status() returns True if successful, False otherwise
-                if client.handle_auth_status(raise_exceptions=True):
-                    # Retry the original request after successful re-authentication
-                    result = client.get(path=path, params=params)
-                    return {"data": result.data}
-                else:
-                    return {"error": "Session expired and re-authentication returned False"}
-            except Exception as reauth_error:
-                logger.error("Re-authentication failed: %s", reauth_error)
-                return {"error": f"Session expired and re-authentication failed: {type(reauth_error).__name__}: {str(reauth_error)}"}
-        return {"error": f"API request failed: {type(e).__name__}: {str(e)}"}
+    result = _request_with_reauth(client, path, params)
+    if cache_ttl is not None and "data" in result and result["data"]:
+        _response_cache.set(cache_key, result["data"], cache_ttl)
+    return result
+
+
+# Requests currently in flight, keyed by request key (see _singleflight)
+_inflight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+
+async def _singleflight(key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Run factory() once for concurrent callers that share the same key.
+
+    The first caller starts the work; callers arriving while it is in flight await the
+    same task instead of issuing a duplicate IBKR request. The task is shielded so a
+    cancelled caller does not cancel the request for the others.
+    """
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(factory())
+        _inflight[key] = task
+
+        def _forget(done: "asyncio.Future[Any]") -> None:
+            if _inflight.get(key) is done:
+                del _inflight[key]
+
+        task.add_done_callback(_forget)
+    return await asyncio.shield(task)
+
+
+async def _call_endpoint_async(path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Async variant of _call_endpoint that runs the request on the shared thread pool.
+
+    Identical concurrent requests are coalesced into a single IBKR call.
+    """
+    return await _singleflight(
+        _request_key(path, params),
+        lambda: _run_blocking(_call_endpoint, path, params),
+    )
+
+
+async def _gather_calls(
+    func: Callable[..., Awaitable[Any]],
+    args_list: List[Tuple[Any, ...]],
+    concurrency: int = 8,
+) -> List[Any]:
+    """
+    Await func(*args) for every args tuple concurrently, at most `concurrency` at a time.
+
+    Used to fan out per-item IBKR requests when the endpoint has no batch form.
+
+    Returns:
+        Results in the same order as args_list.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _run(args: Tuple[Any, ...]) -> Any:
+        async with semaphore:
+            return await func(*args)
+
+    return await asyncio.gather(*(_run(args) for args in args_list))
+
+
+# Encoded call_endpoint responses for cacheable requests, stored with the data object
+# they encode. One is reused only while _response_cache still returns that same
+# object, so it never outlives the response cache entry.
+_encoded_responses = _TTLCache(maxsize=256)
 
 
 @mcp_tool
+@json_errors
 async def call_endpoint(path: str, params: Optional[Dict[str, Any]] = None) -> str:
     """
     Call a specific IBKR endpoint with given parameters.
@@ -231,12 +878,83 @@ async def call_endpoint(path: str, params: Optional[Dict[str, Any]] = None) -> s
 
     For full documentation, use the endpoint_instructions() tool.
     """
-    _result = _call_endpoint(path, params or {})
+    # Rejected paths never reach IBKR: answer them without the thread pool hop
+    if path not in ALLOWED_ENDPOINTS:
+        return _endpoint_not_allowed_json(path)
+
+    params = params or {}
+    _result = await _call_endpoint_async(path, params)
+
+    data = _result.get("data")
+    cache_ttl = _cache_ttl(path, params)
+    if not data or cache_ttl is None:
+        return _to_json(_result)
+
+    key = _request_key(path, params)
+    encoded = _encoded_responses.get(key)
+    if encoded is not None and encoded[0] is data:
+        return encoded[1]
+    encoded_json = _to_json(_result)
+    _encoded_responses.set(key, (data, encoded_json), cache_ttl)
+    return encoded_json
+
 
-    return json.dumps(_result)
+# iserver/accounts primes the brokerage session for market data requests. Its response is
+# kept in memory only (a restarted server needs a fresh call) and refreshed in the
+# background shortly before it expires, so tool calls rarely wait on it.
+ACCOUNTS_CACHE_TTL = 300
+ACCOUNTS_REFRESH_MARGIN = 10
+ACCOUNTS_RETRY_DELAY = 30
+_accounts_cache = _TTLCache(maxsize=1)
+
+
+async def _get_accounts(refresh: bool = False) -> Dict[str, Any]:
+    """
+    Return the iserver/accounts response, from cache unless refresh is set.
+
+    Returns:
+        Dict with 'data' key on success, or 'error' key on failure (errors are not cached).
+    """
+    if not refresh:
+        cached = _accounts_cache.get("accounts")
+        if cached is not None:
+            return cached
+    result = await _call_endpoint_async("iserver/accounts", {})
+    if "error" not in result:
+        _accounts_cache.set("accounts", result, ACCOUNTS_CACHE_TTL)
+    return result
+
+
+async def _keep_accounts_warm() -> None:
+    """
+    Fetch accounts at startup and refresh them before the cached response expires.
+
+    Failures, including unexpected exceptions, are logged and retried after
+    ACCOUNTS_RETRY_DELAY so the task keeps running for the life of the server.
+    """
+    while True:
+        try:
+            result = await _get_accounts(refresh=True)
+        except Exception as e:
+            logger.warning("Accounts prefetch failed: %s: %s", type(e).__name__, e)
+            await asyncio.sleep(ACCOUNTS_RETRY_DELAY)
+            continue
+        if "error" in result:
+            logger.warning("Accounts prefetch failed: %s", result["error"])
+            await asyncio.sleep(ACCOUNTS_RETRY_DELAY)
+        else:
+            await asyncio.sleep(ACCOUNTS_CACHE_TTL - ACCOUNTS_REFRESH_MARGIN)
+
+
+def _accounts_error_json(accounts_result: Dict[str, Any]) -> str:
+    """Encode a failed accounts preflight as a tool error, pre-encoded when there is no client."""
+    if accounts_result is _ERR_NO_CLIENT:
+        return _ERR_ACCOUNTS_NO_CLIENT_JSON
+    return _to_json(_err(f"Failed to get accounts: {accounts_result['error']}"))
 
 
 @mcp_tool
+@json_errors
 async def get_accounts() -> str:
     """
     Get IBKR account information.
@@ -250,29 +968,52 @@ async def get_accounts() -> str:
     Examples:
         get_accounts()
     """
-    _result = _call_endpoint("iserver/accounts", {})
-    return json.dumps(_result)
+    _result = await _get_accounts()
+    return _to_json(_result)
 
 
-@mcp_tool
-async def endpoint_instructions() -> str:
+def _read_doc(filename: str, label: str) -> str:
     """
-    Get detailed documentation for calling IBKR endpoints.
+    Read a markdown documentation file shipped next to this module.
+
+    The files are static and small, so each is read once at import (see the
+    constants below) and the doc tools never block the event loop on file I/O.
+
+    Args:
+        filename: File name relative to this module's directory.
+        label: Description used in the not-found error message.
 
     Returns:
-        Markdown formatted documentation of all tools, parameters, and examples.
+        The file contents, or an error string if it cannot be read.
     """
-    # Read the documentation from the external file
-    file_path = os.path.join(os.path.dirname(__file__), "endpoints.md")
+    file_path = os.path.join(os.path.dirname(__file__), filename)
     try:
         with open(file_path, "r", encoding="utf-8") as f:
             return f.read()
     except FileNotFoundError:
-        return f"Error: Documentation file not found at {file_path}"
+        return f"Error: {label} not found at {file_path}"
     except Exception as e:
         return f"Error reading documentation: {str(e)}"
 
 
+_ENDPOINTS_DOC = _read_doc("endpoints.md", "Documentation file")
+_MARKET_DATA_FIELDS_DOC = _read_doc("market_data_fields.md", "Market data fields documentation")
+_MARKET_DATA_FIELDS_ORIGINAL_DOC = _read_doc(
+    "market_data_fields_original.md", "Original market data fields documentation"
+)
+
+
+@mcp_tool
+async def endpoint_instructions() -> str:
+    """
+    Get detailed documentation for calling IBKR endpoints.
+
+    Returns:
+        Markdown formatted documentation of all tools, parameters, and examples.
+    """
+    return _ENDPOINTS_DOC
+
+
 @mcp_tool
 async def market_data_fields() -> str:
     """
@@ -282,15 +1023,7 @@ async def market_data_fields() -> str:
         Markdown formatted documentation of all market data fields organized by category.
         Includes Price Data, Volume, Position/PnL, Options Greeks, Fundamentals, etc.
     """
-    # Read the market data fields documentation from the external file
-    file_path = os.path.join(os.path.dirname(__file__), "market_data_fields.md")
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            return f.read()
-    except FileNotFoundError:
-        return f"Error: Market data fields documentation not found at {file_path}"
-    except Exception as e:
-        return f"Error reading documentation: {str(e)}"
+    return _MARKET_DATA_FIELDS_DOC
 
 
 @mcp_tool
@@ -302,83 +1035,388 @@ async def market_data_fields_original() -> str:
         Markdown formatted documentation with all fields sorted by Field ID.
         Use this for quick field ID lookups.
     """
-    # Read the original market data fields documentation from the external file
-    file_path = os.path.join(os.path.dirname(__file__), "market_data_fields_original.md")
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            return f.read()
-    except FileNotFoundError:
-        return f"Error: Original market data fields documentation not found at {file_path}"
-    except Exception as e:
-        return f"Error reading documentation: {str(e)}"
+    return _MARKET_DATA_FIELDS_ORIGINAL_DOC
+
+
+# Returned by _extract_items for payloads without items. It is immutable, so it is
+# safe to share, and callers can test for it by identity.
+_NO_ITEMS: Tuple[Any, ...] = ()
+
+
+def _extract_items(data: Any) -> Sequence[Any]:
+    """
+    Return the list of items from an IBKR response payload.
+
+    Most endpoints (e.g. iserver/secdef/search, iserver/marketdata/snapshot) return
+    a list directly, but some responses wrap it as {"data": [...]}.
+
+    Args:
+        data: The "data" value returned by _call_endpoint.
+
+    Returns:
+        List of items, or _NO_ITEMS if the payload has no items.
+    """
+    # Fast path: a bare list is by far the most common response shape
+    if type(data) is list:
+        return data or _NO_ITEMS
+    if isinstance(data, dict):
+        items = data.get("data")
+        return items if isinstance(items, list) and items else _NO_ITEMS
+    if isinstance(data, list):
+        return data or _NO_ITEMS
+    return _NO_ITEMS
 
 
 # Default market data fields for snapshot
 SNAPSHOT_FIELDS = "31,55,70,71,82,83,84,86,87,6008,6070,6457,7051,7084,7085,7086,7087,7088,7089,7282,7283,7285,7289,7290,7291,7293,7294,7295,7296,7607,7633,7638,7644,7655,7674,7675,7676,7677,7682,7683,7684,7685,7686,7687,7688,7689,7690,7718,7741,7762"
 
 
-def _get_snapshot(conids: str, delay: int = 50, requested_symbols: Optional[str] = None) -> Dict[str, Any]:
+# Comma-separated symbols that are already normalized (uppercase, no whitespace);
+# used with fullmatch, since `$` would also accept a trailing newline
+_CLEAN_SYMBOLS_RE = re.compile(r"[A-Z0-9.\-]+(?:,[A-Z0-9.\-]+)*")
+# Comma separator with any surrounding whitespace, so splitting also strips the items
+_COMMA = re.compile(r"\s*,\s*")
+
+_SNAPSHOT_FIELD_KEYS = tuple(SNAPSHOT_FIELDS.split(","))
+
+
+@functools.singledispatch
+def _normalize_fields(fields: Any) -> Tuple[str, ...]:
+    """
+    Normalize requested snapshot fields to a tuple of field ID strings.
+
+    Dispatches on the input type: a comma-separated string, a list or tuple of IDs,
+    or None for the default SNAPSHOT_FIELDS. Register further types here rather
+    than branching in the callers.
+    """
+    raise TypeError(f"fields must be a comma-separated string or a list, not {type(fields).__name__}")
+
+
+@_normalize_fields.register(str)
+@functools.lru_cache(maxsize=256)
+def _(fields: str) -> Tuple[str, ...]:
+    return tuple(f for f in _COMMA.split(fields.strip()) if f) or _SNAPSHOT_FIELD_KEYS
+
+
+@_normalize_fields.register(list)
+@_normalize_fields.register(tuple)
+def _(fields: Sequence[Any]) -> Tuple[str, ...]:
+    return tuple(str(f).strip() for f in fields if str(f).strip()) or _SNAPSHOT_FIELD_KEYS
+
+
+@_normalize_fields.register(type(None))
+def _(fields: None) -> Tuple[str, ...]:
+    return _SNAPSHOT_FIELD_KEYS
+
+
+# Tool arguments repeat a lot (the same watchlist is queried over and over), so the
+# parsers below are memoized; they return tuples, which are safe to share
+@functools.lru_cache(maxsize=1024)
+def _parse_symbols(symbols: str) -> Tuple[str, ...]:
+    """
+    Split comma-separated ticker symbols into a tuple of interned uppercase symbols.
+
+    Input that is already normalized (e.g. "AAPL" or "AAPL,MSFT") is used as-is;
+    anything else is stripped and uppercased per symbol. Symbols are interned so
+    repeated queries reuse the same string objects, and the tuple can be used
+    directly as a cache key.
+
+    Args:
+        symbols: Comma-separated ticker symbols (e.g., "AAPL,QQQ,MSFT" or "aapl, qqq")
+
+    Returns:
+        Tuple of uppercase ticker symbols, empty if none were given.
+    """
+    if _CLEAN_SYMBOLS_RE.fullmatch(symbols):
+        # Single symbol (the common case): no split needed
+        return tuple(map(sys.intern, symbols.split(","))) if "," in symbols else (sys.intern(symbols),)
+    return tuple(sys.intern(s) for s in _COMMA.split(symbols.strip().upper()) if s)
+
+
+# IBKR accepts at most 100 conids per iserver/marketdata/snapshot request
+SNAPSHOT_MAX_CONIDS = 100
+
+# Snapshot polling backoff: first re-poll after ~0.25s, doubling up to 8s between polls
+SNAPSHOT_POLL_INITIAL = 0.25
+SNAPSHOT_POLL_MAX = 8.0
+
+
+def _snapshot_complete(data: Any, fields: Tuple[str, ...]) -> bool:
+    """Return True if every snapshot row already carries every requested field."""
+    items = _extract_items(data)
+    return items is not _NO_ITEMS and all(
+        all(field in item for field in fields) for item in items
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_conids(conids: str) -> Tuple[str, ...]:
+    """Split comma-separated conids, dropping whitespace and empty entries."""
+    return tuple(c for c in _COMMA.split(conids.strip()) if c)
+
+
+async def _poll_snapshot(conids: str, delay: int, fields: Tuple[str, ...] = _SNAPSHOT_FIELD_KEYS) -> Dict[str, Any]:
+    """
+    Prime the snapshot for conids and poll until it is populated.
+
+    The first call asks IBKR to start streaming the fields; the snapshot is then
+    re-polled with exponential backoff and jitter until every row has every field,
+    or until `delay` seconds have passed.
+
+    Returns:
+        The last snapshot call's result: dict with 'data' key, or 'error' key.
+    """
+    logger.info("Fetching market snapshot for conids %s (delay=%ss)...", conids, delay)
+
+    # All calls send identical params, so build them once
+    params = {"conids": conids, "fields": ",".join(fields)}
+
+    # First call - initiates data fetch
+    await _call_endpoint_async("iserver/marketdata/snapshot", params)
+
+    # Poll until the data is populated or the delay is used up; always poll at least once
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + delay
+    attempt = 0
+    while True:
+        pause = min(SNAPSHOT_POLL_MAX, SNAPSHOT_POLL_INITIAL * 2 ** attempt) * (0.5 + random.random())
+        await asyncio.sleep(max(0.0, min(pause, deadline - loop.time())))
+        attempt += 1
+        snapshot_result = await _call_endpoint_async("iserver/marketdata/snapshot", params)
+        if "error" in snapshot_result or loop.time() >= deadline or _snapshot_complete(snapshot_result.get("data"), fields):
+            return snapshot_result
+
+
+# Completed snapshots are reused for a few seconds: agents often repeat the same quote
+# request while exploring, and a re-poll would return near-identical data anyway.
+SNAPSHOT_CACHE_TTL = 10
+_snapshot_cache = _TTLCache(maxsize=256)
+
+
+async def _fetch_snapshot_batch(conids: str, delay: int, fields: Tuple[str, ...]) -> Dict[str, Any]:
+    """Return a recent snapshot for up to 100 conids, polling IBKR only on a cache miss."""
+    key = ("snapshot", conids, delay, fields)
+    cached = _snapshot_cache.get(key)
+    if cached is not None:
+        return cached
+    result = await _singleflight(key, functools.partial(_poll_snapshot, conids, delay, fields))
+    if "error" not in result:
+        _snapshot_cache.set(key, result, SNAPSHOT_CACHE_TTL)
+    return result
+
+
+async def _get_snapshot(
+    conids: str,
+    delay: int = 50,
+    requested_symbols: Optional[List[str]] = None,
+    fields: Tuple[str, ...] = _SNAPSHOT_FIELD_KEYS,
+) -> Dict[str, Any]:
     """
     Helper function to fetch market snapshot for one or more conids.
 
-    Makes two API calls with a delay in between to ensure market data is populated.
-    Supports up to 100 conids per request (comma-separated).
+    Waits at most `delay` seconds for the fields to populate; quotes that populate
+    quickly return in a second or two (see _poll_snapshot). Concurrent requests for
+    the same conids, delay and fields share one priming call and one polling loop, however
+    they were requested (by conid or by symbol), and the result is reused for
+    SNAPSHOT_CACHE_TTL seconds.
+    IBKR accepts at most 100 conids per snapshot request; longer lists are split into
+    batches of 100 that are fetched concurrently and merged in order.
     
     Args:
         conids: Comma-separated IBKR contract IDs (e.g., "265598" for AAPL, or "265598,123456" for multiple)
-        delay: Delay in seconds between API calls (default: 50). Minimum recommended is 50.
-        requested_symbols: Optional comma-separated symbols to include in the response (e.g., "AAPL,MSFT")
+        delay: Maximum seconds to wait for fields to populate (default: 50).
+        requested_symbols: Optional symbols to include in the response, one per conid (e.g., ["AAPL", "MSFT"])
+        fields: Field IDs to request, as returned by _normalize_fields (default: SNAPSHOT_FIELDS)
 
     Returns:
         Dict with market snapshot data or error.
     """
-    import time
+    if conids.count(",") < SNAPSHOT_MAX_CONIDS:
+        batches = [conids]
+    else:
+        conid_list = _parse_conids(conids)
+        batches = [
+            ",".join(conid_list[i:i + SNAPSHOT_MAX_CONIDS])
+            for i in range(0, len(conid_list), SNAPSHOT_MAX_CONIDS)
+        ]
+
+    results = await asyncio.gather(*(_fetch_snapshot_batch(batch, delay, fields) for batch in batches))
+
+    for snapshot_result in results:
+        if "error" in snapshot_result:
+            return _err(f"Failed to get snapshot: {snapshot_result['error']}")
+
+    if len(results) == 1:
+        snapshot_data = results[0].get("data", {})
+    else:
+        snapshot_data = [item for result in results for item in _extract_items(result.get("data"))]
 
-    logger.info(f"Fetching market snapshot for conids {conids} (delay={delay}s)...")
+    # Add requested_symbols to the response if provided
+    # iserver/marketdata/snapshot returns a list directly, not wrapped in {"data": [...]}
+    if requested_symbols:
+        items = _extract_items(snapshot_data)
+        if items is not _NO_ITEMS:
+            # Tag copies: coalesced callers share the same response rows
+            tagged = [dict(item, requested_symbol=symbol) for item, symbol in zip(items, requested_symbols)]
+            tagged.extend(items[len(tagged):])
+            snapshot_data = {**snapshot_data, "data": tagged} if isinstance(snapshot_data, dict) else tagged
+
+    return snapshot_data
 
-    # First call - initiates data fetch
-    snapshot_result_1 = _call_endpoint(
-        "iserver/marketdata/snapshot",
-        {"conids": conids, "fields": SNAPSHOT_FIELDS}
-    )
 
-    # Wait for data to populate
-    time.sleep(delay)
+def _conid_match(conid: Any, symbol: Optional[str], requested_symbol: str) -> Dict[str, Any]:
+    """
+    Build a resolved-conid result.
+
+    This is the fixed-shape record returned by search_conids and stored in the conid
+    index. It stays a plain dict so it round-trips unchanged through the persistent
+    cache, and orjson encodes it without a per-type fallback.
+    """
+    return {"conid": conid, "symbol": symbol, "requested_symbol": requested_symbol}
 
-    # Second call - retrieves populated data
-    snapshot_result_2 = _call_endpoint(
-        "iserver/marketdata/snapshot",
-        {"conids": conids, "fields": SNAPSHOT_FIELDS}
+
+def _match_search_result(symbol: str, items: Sequence[Any]) -> Optional[Dict[str, Any]]:
+    """
+    Pick the conid for a symbol from iserver/secdef/search results.
+
+    Prefers an exact symbol match and falls back to the first result.
+    """
+    if items is _NO_ITEMS:
+        return None
+    # Try to find exact symbol match first
+    for item in items:
+        if item.get("symbol", "").upper() == symbol and item.get("conid"):
+            return _conid_match(item.get("conid"), item.get("symbol"), symbol)
+    # If exact match not found, use first result
+    first = items[0]
+    if not first.get("conid"):
+        return None
+    return _conid_match(first.get("conid"), first.get("symbol"), symbol)
+
+
+def _match_stock_entries(symbol: str, entries: Any) -> Optional[Dict[str, Any]]:
+    """
+    Pick the conid for a symbol from a trsrv/stocks entry list.
+
+    trsrv/stocks returns {"AAPL": [{"name": ..., "contracts": [{"conid": ..., "isUS": ...}]}]}.
+    Prefers the first US-listed contract and falls back to the first contract.
+    """
+    if not isinstance(entries, list):
+        return None
+    fallback = None
+    for entry in entries:
+        for contract in entry.get("contracts") or []:
+            if not contract.get("conid"):
+                continue
+            if contract.get("isUS"):
+                return _conid_match(contract["conid"], symbol, symbol)
+            if fallback is None:
+                fallback = contract["conid"]
+    if fallback is None:
+        return None
+    return _conid_match(fallback, symbol, symbol)
+
+
+def _symbol_not_found(symbol: str) -> Dict[str, Any]:
+    return _err(f"Could not find conid for symbol {symbol}", requested_symbol=symbol)
+
+
+async def _search_conid(symbol: str) -> Dict[str, Any]:
+    """Resolve a single symbol via iserver/secdef/search."""
+    search_result = await _call_endpoint_async(
+        "iserver/secdef/search",
+        {"symbol": symbol, "sectype": "STK"}
     )
 
-    if "error" in snapshot_result_2:
-        return {"error": f"Failed to get snapshot: {snapshot_result_2.get('error')}"}
+    if "error" in search_result:
+        return _err(f"Failed to search for {symbol}: {search_result['error']}", requested_symbol=symbol)
 
-    # Add requested_symbols to the response if provided
-    snapshot_data = snapshot_result_2.get("data", {})
-    # iserver/marketdata/snapshot returns a list directly, not wrapped in {"data": [...]}
-    if requested_symbols:
-        if isinstance(snapshot_data, list):
-            items = snapshot_data
-        elif isinstance(snapshot_data, dict):
-            items = snapshot_data.get("data", [])
+    # iserver/secdef/search returns a list directly, not wrapped in {"data": [...]}
+    match = _match_search_result(symbol, _extract_items(search_result.get("data")))
+    if match is None:
+        _unknown_symbols.set(symbol, True, UNKNOWN_SYMBOL_TTL)
+        return _symbol_not_found(symbol)
+    return match
+
+
+# Per-symbol index of resolved conids. Unlike the response cache, which is keyed by the
+# whole request, this lets any later query reuse a symbol resolved in another combination.
+CONID_INDEX_TTL = 86400
+_conid_index = _TTLCache(persist_path=CACHE_PATH, namespace="conid")
+
+# Symbols IBKR returned no match for. Repeated lookups of a bogus ticker (a common LLM
+# mistake) are rejected locally instead of costing two round trips each time.
+UNKNOWN_SYMBOL_TTL = 3600
+_unknown_symbols = _TTLCache()
+
+
+async def _resolve_conids(symbol_list: Tuple[str, ...]) -> List[Dict[str, Any]]:
+    """
+    Resolve ticker symbols to conids.
+
+    Symbols already in the conid index, or recently found not to exist, are answered
+    locally. The rest are looked up
+    in one trsrv/stocks request; symbols missing from that response (or all of them,
+    if the request fails) fall back to concurrent per-symbol iserver/secdef/search
+    requests.
+
+    Args:
+        symbol_list: Uppercase ticker symbols.
+
+    Returns:
+        One dict per symbol, in order: {"conid", "symbol", "requested_symbol"} on success,
+        or {"error", "requested_symbol"} on failure.
+    """
+    resolved: Dict[str, Dict[str, Any]] = {}
+    for symbol in symbol_list:
+        match = _conid_index.get(symbol, load=False)
+        if match is not None:
+            resolved[symbol] = match
+        elif _unknown_symbols.get(symbol):
+            resolved[symbol] = _symbol_not_found(symbol)
+
+    pending = [symbol for symbol in dict.fromkeys(symbol_list) if symbol not in resolved]
+
+    # The persisted index is read (and written back below) on the IO pool, once per call
+    if pending and _conid_index.persistent:
+        resolved.update(await _run_blocking(_conid_index.load_many, pending))
+        pending = [symbol for symbol in pending if symbol not in resolved]
+
+    found: Dict[str, Dict[str, Any]] = {}
+    if len(pending) > 1:
+        batch_result = await _call_endpoint_async("trsrv/stocks", {"symbols": ",".join(pending)})
+        stocks = batch_result.get("data")
+        if isinstance(stocks, dict):
+            for symbol in pending:
+                match = _match_stock_entries(symbol, stocks.get(symbol))
+                if match is not None:
+                    resolved[symbol] = found[symbol] = match
+
+    misses = [symbol for symbol in pending if symbol not in resolved]
+    if misses:
+        matches = await _gather_calls(_search_conid, [(symbol,) for symbol in misses])
+        for symbol, match in zip(misses, matches):
+            resolved[symbol] = match
+            if "error" not in match:
+                found[symbol] = match
+
+    if found:
+        if _conid_index.persistent:
+            await _run_blocking(_conid_index.set_many, found, CONID_INDEX_TTL)
         else:
-            items = []
-        if items:
-            symbol_list = [s.strip().upper() for s in requested_symbols.split(",")]
-            for i, item in enumerate(items):
-                if i < len(symbol_list):
-                    item["requested_symbol"] = symbol_list[i]
+            _conid_index.set_many(found, CONID_INDEX_TTL)
 
-    return snapshot_data
+    return [resolved[symbol] for symbol in symbol_list]
 
 
 @mcp_tool
+@json_errors
 async def search_conids(symbols: str) -> str:
     """
     Find conids for given ticker symbols.
 
     This resolves comma-separated ticker symbols (e.g., "AAPL,QQQ,MSFT") to their IBKR contract IDs (conids).
+    Multiple symbols are resolved with a single IBKR request.
 
     Args:
         symbols: Comma-separated ticker symbols (e.g., "AAPL,QQQ,MSFT")
@@ -390,69 +1428,33 @@ async def search_conids(symbols: str) -> str:
         search_conids(symbols="AAPL")
         search_conids(symbols="AAPL,QQQ,MSFT")
     """
-    symbol_list = [s.strip().upper() for s in symbols.split(",")]
-    results = []
-    
-    for symbol in symbol_list:
-        search_result = _call_endpoint(
-            "iserver/secdef/search",
-            {"symbol": symbol, "sectype": "STK"}
-        )
-
-        if "error" in search_result:
-            results.append({"requested_symbol": symbol, "error": search_result.get("error")})
-            continue
-
-        data = search_result.get("data", {})
-        conid = None
-        matched_symbol = None
-        
-        # iserver/secdef/search returns a list directly, not wrapped in {"data": [...]}
-        if isinstance(data, list):
-            items = data
-        elif isinstance(data, dict):
-            items = data.get("data", [])
-        else:
-            items = []
-        
-        if items:
-            # Try to find exact symbol match first
-            for item in items:
-                if item.get("symbol", "").upper() == symbol:
-                    conid = item.get("conid")
-                    matched_symbol = item.get("symbol")
-                    break
-            # If exact match not found, use first result
-            if not conid:
-                conid = items[0].get("conid")
-                matched_symbol = items[0].get("symbol")
-
-        if not conid:
-            results.append({"requested_symbol": symbol, "error": f"Could not find conid for symbol {symbol}"})
-        else:
-            results.append({
-                "conid": conid,
-                "symbol": matched_symbol,
-                "requested_symbol": symbol
-            })
-
-    return json.dumps({"results": results})
+    symbol_list = _parse_symbols(symbols)
+    if not symbol_list:
+        return _ERR_NO_SYMBOLS_JSON
+    results = await _resolve_conids(symbol_list)
+    return _to_json({"results": results})
 
 
 @mcp_tool
-async def get_snapshot_by_conids(conids: str, delay: int = 50) -> str:
+@json_errors
+async def get_snapshot_by_conids(conids: str, delay: int = 50, fields: Optional[Union[str, List[Union[str, int]]]] = None) -> str:
     """
     Get market snapshot for given conids.
 
     This is a convenience endpoint that first calls get_accounts() to prepare the session,
     then fetches market snapshots for the given conids.
-    Supports up to 100 conids per request (comma-separated).
+    Accepts any number of conids (comma-separated); more than 100 are fetched in
+    concurrent batches of 100.
 
     Path (1): get_accounts() -> get_snapshot()
 
     Args:
         conids: Comma-separated IBKR contract IDs (e.g., "265598" or "265598,123456")
-        delay: Delay in seconds between API calls (default: 50). Minimum recommended is 50.
+        delay: Maximum seconds to wait for all fields to populate (default: 50). The snapshot
+            is returned as soon as every field is present.
+        fields: Optional market data field IDs to request, comma-separated or as a list
+            (e.g., "31,84,86"). Defaults to a set covering price, volume, fundamentals and
+            EMAs; see market_data_fields() for the available IDs.
 
     Returns:
         JSON string with market snapshot data including price, volume, and other fields.
@@ -461,31 +1463,43 @@ async def get_snapshot_by_conids(conids: str, delay: int = 50) -> str:
         get_snapshot_by_conids(conids="265598")
         get_snapshot_by_conids(conids="265598,123456,789012")
         get_snapshot_by_conids(conids="265598", delay=60)
+        get_snapshot_by_conids(conids="265598", fields="31,84,86")
     """
+    conid_list = _parse_conids(conids)
+    if not conid_list:
+        return _ERR_NO_CONIDS_JSON
+
     # First call get_accounts to prepare session
-    accounts_result = _call_endpoint("iserver/accounts", {})
+    accounts_result = await _get_accounts()
     if "error" in accounts_result:
-        return json.dumps({"error": f"Failed to get accounts: {accounts_result.get('error')}"})
+        return _accounts_error_json(accounts_result)
 
-    # Then get snapshot
-    result = _get_snapshot(conids, delay)
-    return json.dumps(result)
+    # Then get snapshot; rejoining the parsed conids drops stray whitespace, so
+    # "265598, 8314" and "265598,8314" share one request and cache entry
+    result = await _get_snapshot(",".join(conid_list), delay, fields=_normalize_fields(fields))
+    return _to_json(result)
 
 
 @mcp_tool
-async def get_snapshot_by_symbols(symbols: str, delay: int = 50) -> str:
+@json_errors
+async def get_snapshot_by_symbols(symbols: str, delay: int = 50, fields: Optional[Union[str, List[Union[str, int]]]] = None) -> str:
     """
     Get market snapshot for given ticker symbols.
 
     This is a convenience endpoint that first calls get_accounts() to prepare the session,
     then resolves the symbols to conids, then fetches market snapshots.
-    Supports up to 100 symbols per request (comma-separated).
+    Accepts any number of symbols (comma-separated); more than 100 are fetched in
+    concurrent batches of 100.
 
     Path (2): get_accounts() -> search_conids() -> get_snapshot()
 
     Args:
         symbols: Comma-separated ticker symbols (e.g., "AAPL" or "AAPL,QQQ,MSFT")
-        delay: Delay in seconds between API calls (default: 50). Minimum recommended is 50.
+        delay: Maximum seconds to wait for all fields to populate (default: 50). The snapshot
+            is returned as soon as every field is present.
+        fields: Optional market data field IDs to request, comma-separated or as a list
+            (e.g., "31,84,86"). Defaults to a set covering price, volume, fundamentals and
+            EMAs; see market_data_fields() for the available IDs.
 
     Returns:
         JSON string with market snapshot data including price, volume, and other fields.
@@ -494,63 +1508,211 @@ async def get_snapshot_by_symbols(symbols: str, delay: int = 50) -> str:
         get_snapshot_by_symbols(symbols="AAPL")
         get_snapshot_by_symbols(symbols="AAPL,QQQ,MSFT")
         get_snapshot_by_symbols(symbols="AAPL,QQQ", delay=60)
+        get_snapshot_by_symbols(symbols="AAPL", fields=[31, 84, 86])
     """
-    # First call get_accounts to prepare session
-    accounts_result = _call_endpoint("iserver/accounts", {})
+    symbol_list = _parse_symbols(symbols)
+    if not symbol_list:
+        return _ERR_NO_SYMBOLS_JSON
+
+    # Prepare the session and resolve conids concurrently: symbol search does not
+    # depend on the accounts call, only the snapshot does
+    accounts_result, matches = await asyncio.gather(
+        _get_accounts(),
+        _resolve_conids(symbol_list),
+    )
     if "error" in accounts_result:
-        return json.dumps({"error": f"Failed to get accounts: {accounts_result.get('error')}"})
+        return _accounts_error_json(accounts_result)
 
-    # Then search for conids
-    symbol_list = [s.strip().upper() for s in symbols.split(",")]
     conid_list = []
     matched_symbols = []
-    
-    for symbol in symbol_list:
-        search_result = _call_endpoint(
-            "iserver/secdef/search",
-            {"symbol": symbol, "sectype": "STK"}
-        )
 
-        if "error" in search_result:
-            return json.dumps({"error": f"Failed to search for {symbol}: {search_result.get('error')}"})
-
-        data = search_result.get("data", {})
-        conid = None
-        matched_symbol = None
-        
-        # iserver/secdef/search returns a list directly, not wrapped in {"data": [...]}
-        if isinstance(data, list):
-            items = data
-        elif isinstance(data, dict):
-            items = data.get("data", [])
-        else:
-            items = []
-        
-        if items:
-            # Try to find exact symbol match first
-            for item in items:
-                if item.get("symbol", "").upper() == symbol:
-                    conid = item.get("conid")
-                    matched_symbol = item.get("symbol")
-                    break
-            # If exact match not found, use first result
-            if not conid:
-                conid = items[0].get("conid")
-                matched_symbol = items[0].get("symbol")
-
-        if not conid:
-            return json.dumps({"error": f"Could not find conid for symbol {symbol}"})
-
-        conid_list.append(str(conid))
-        matched_symbols.append(matched_symbol)
-
-    # Build conids string and requested_symbols
-    conids = ",".join(conid_list)
-    requested_symbols = ",".join(matched_symbols)
-
-    # Then get snapshot
-    result = _get_snapshot(conids, delay, requested_symbols)
-    return json.dumps(result)
+    for match in matches:
+        if "error" in match:
+            return _to_json(_err(match["error"]))
+
+        conid_list.append(str(match["conid"]))
+        matched_symbols.append(match["symbol"])
+
+    # Then get snapshot; matched symbols are passed as a list so they are not
+    # joined here only to be split again when tagging the rows
+    result = await _get_snapshot(",".join(conid_list), delay, matched_symbols, _normalize_fields(fields))
+    return _to_json(result)
+
+
+# Bar keys returned by iserver/marketdata/history, in column order
+HISTORY_BAR_KEYS = ("o", "h", "l", "c", "v", "t")
+
+# outsideRth query values for the tri-state outside_rth argument; None leaves the
+# parameter out so IBKR applies its default (regular trading hours only)
+_OUTSIDE_RTH_PARAM = {True: "true", False: "false"}
+
+
+def _bars_to_columns(bars: list) -> Dict[str, list]:
+    """
+    Convert IBKR history bars from a list of dicts to a dict of lists.
+
+    IBKR returns bars as [{"o": .., "h": .., "l": .., "c": .., "v": .., "t": ..}, ...].
+    The columnar layout repeats each key once instead of once per bar, which
+    makes the JSON response smaller and faster to encode for 1000-bar requests.
+
+    Args:
+        bars: List of bar dicts from the history response "data" key.
+
+    Returns:
+        Dict mapping each bar key (o, h, l, c, v, t) to a list of values.
+    """
+    columns: Dict[str, list] = {key: [] for key in HISTORY_BAR_KEYS}
+    appenders = [(key, columns[key].append) for key in HISTORY_BAR_KEYS]
+    for bar in bars:
+        for key, append in appenders:
+            append(bar.get(key))
+    return columns
+
+
+# IBKR rejects more than 5 concurrent iserver/marketdata/history requests. Batch calls
+# stay within that so waiting requests do not tie up IO threads.
+HISTORY_CONCURRENCY = ENDPOINT_CONCURRENCY["iserver/marketdata/history"]
+
+
+async def _get_history(conid: str, period: str, bar: str, outside_rth: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Fetch history bars for one conid and convert them to the columnar layout.
+
+    Returns:
+        Dict with "conid", "meta", "columns" and "bars", or an error dict.
+    """
+    params = {"conid": conid, "period": period, "bar": bar}
+    if outside_rth is not None:
+        params["outsideRth"] = _OUTSIDE_RTH_PARAM[outside_rth]
+    history_result = await _call_endpoint_async("iserver/marketdata/history", params)
+
+    if "error" in history_result:
+        return _err(f"Failed to get history: {history_result['error']}", conid=conid)
+
+    history = history_result.get("data")
+    if not isinstance(history, dict):
+        return _err(f"No historical data available for conid {conid}", conid=conid)
+
+    bars = history.get("data") or []
+    meta = {key: value for key, value in history.items() if key != "data"}
+
+    return {
+        "conid": conid,
+        "meta": meta,
+        "columns": _bars_to_columns(bars),
+        "bars": len(bars),
+    }
+
+
+@mcp_tool
+@json_errors
+async def get_history_by_conid(
+    conid: str,
+    period: str = "1w",
+    bar: str = "1d",
+    outside_rth: Optional[bool] = None,
+) -> str:
+    """
+    Get historical market data bars for a conid in a columnar layout.
+
+    Bars are returned as parallel arrays ("columns") instead of one object per bar:
+    columns["c"][i] is the close of the bar starting at columns["t"][i].
+    IBKR returns at most 1000 bars per request.
+
+    Args:
+        conid: IBKR contract ID (e.g., "265598" for AAPL)
+        period: Overall duration (e.g., "1d", "1w", "6m", "1y"). Default: "1w"
+        bar: Bar size (e.g., "1min", "1h", "1d", "1w"). Default: "1d"
+        outside_rth: Include bars outside regular trading hours (pre/post-market).
+            Default: IBKR's default (regular trading hours only)
+
+    Returns:
+        JSON string with "meta" (symbol, startTime, barLength, ...), "columns"
+        (o, h, l, c, v, t arrays) and "bars" (number of bars), or error dict.
+
+    Examples:
+        get_history_by_conid(conid="265598")
+        get_history_by_conid(conid="265598", period="1d", bar="5min")
+        get_history_by_conid(conid="265598", period="1y", bar="1w")
+        get_history_by_conid(conid="265598", period="1d", bar="5min", outside_rth=True)
+    """
+    conid = conid.strip()
+    return _to_json(await _get_history(conid, period, bar, outside_rth))
+
+
+@mcp_tool
+@json_errors
+async def get_history_by_conids(
+    conids: str,
+    period: str = "1w",
+    bar: str = "1d",
+    outside_rth: Optional[bool] = None,
+) -> str:
+    """
+    Get historical market data bars for several conids at once.
+
+    Requests are issued concurrently (up to IBKR's limit of 5 at a time), so the
+    call takes about as long as the slowest conid rather than the sum of all.
+    Each result has the same layout as get_history_by_conid().
+
+    Args:
+        conids: Comma-separated IBKR contract IDs (e.g., "265598,8314")
+        period: Overall duration (e.g., "1d", "1w", "6m", "1y"). Default: "1w"
+        bar: Bar size (e.g., "1min", "1h", "1d", "1w"). Default: "1d"
+        outside_rth: Include bars outside regular trading hours (pre/post-market).
+            Default: IBKR's default (regular trading hours only)
+
+    Returns:
+        JSON string with "results": one entry per conid, in order, and "bars": the
+        total bar count across all conids. Failed conids have an "error" key
+        instead of "columns".
+
+    Examples:
+        get_history_by_conids(conids="265598,8314")
+        get_history_by_conids(conids="265598,8314,4391", period="1d", bar="5min")
+    """
+    conid_list = _parse_conids(conids)
+    if not conid_list:
+        return _ERR_NO_CONIDS_JSON
+
+    results = await _gather_calls(
+        _get_history,
+        [(conid, period, bar, outside_rth) for conid in conid_list],
+        concurrency=HISTORY_CONCURRENCY,
+    )
+    return _to_json({"results": results, "bars": sum(result.get("bars", 0) for result in results)})
+
+
+def create_app() -> Starlette:
+    """
+    Build the ASGI app served by uvicorn (with --factory).
+
+    Wraps FastMCP's streamable HTTP app so that, alongside the MCP session manager,
+    its lifespan runs a background task keeping the accounts response warm. The
+    accounts preflight is then off the critical path of the first tool call. On
+    shutdown the IBKR client is closed (OAuth logout, pooled connections released).
+    """
+    app = server.streamable_http_app()
+    session_lifespan = app.router.lifespan_context
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette):
+        async with session_lifespan(app):
+            prefetch = asyncio.create_task(_keep_accounts_warm())
+            try:
+                yield
+            finally:
+                prefetch.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await prefetch
+                # _singleflight shields its tasks, so a request the prefetch started can
+                # still be running on the pool; let it finish before the client is closed
+                if _inflight:
+                    await asyncio.wait(list(_inflight.values()))
+                await _run_blocking(_reset_client)
+
+    app.router.lifespan_context = lifespan
+    return app
 
 
 if __name__ == "__main__":
@@ -565,10 +1727,11 @@ if __name__ == "__main__":
     logger.info("  - Health: http://localhost:8000/health")
     logger.info("")
 
-    # Run with uvicorn using the streamable_http_app
+    # Run with uvicorn using the create_app factory
     # Disable host validation to allow access from Docker containers
     uvicorn.run(
-        "src.endpoint_server:server.streamable_http_app",
+        "src.endpoint_server:create_app",
+        factory=True,
         host="0.0.0.0",
         port=8000,
         lifespan="on",